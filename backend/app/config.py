@@ -1,63 +1,78 @@
 from __future__ import annotations
 
 import os
+from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
 
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-load_dotenv()
-
-
-class Settings(BaseModel):
-    """Centralized application configuration."""
-
-    google_api_key: str = Field(..., description="API key for Gemini / Google Generative AI")
-    gemini_model: str = Field(default="gemini-1.5-flash", description="Gemini model used for orchestration")
-    serpapi_api_key: str = Field(..., description="API key for SerpAPI (Google Search)")
-    default_language: str = Field(default="it", description="Default language for answers")
-    search_language: str = Field(default="it", description="Language hint for SerpAPI (hl parameter)")
-    search_country: str = Field(default="it", description="Country hint for SerpAPI (gl parameter)")
-    search_max_results: int = Field(default=6, description="How many results to fetch per query")
-    export_output_dir: str = Field(
-        default="generated_guides",
-        description="Directory where generated HTML guides are stored",
-    )
+
+# Parse .env at most once per process, even if this module ends up imported
+# under two names (e.g. both "app.config" and "backend.app.config").
+if not os.environ.get("_LANGNERD_DOTENV_LOADED"):
+    load_dotenv()
+    os.environ["_LANGNERD_DOTENV_LOADED"] = "1"
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Centralized application configuration.
+
+    A frozen slotted dataclass instead of a Pydantic model: every field comes
+    from trusted env vars validated in :func:`get_settings`, so we skip schema
+    build at import time and pay plain slot access on the hot path.
+    """
+
+    google_api_key: str
+    serpapi_api_key: str
+    gemini_model: str = "gemini-1.5-flash"
+    default_language: str = "it"
+    search_language: str = "it"
+    search_country: str = "it"
+    search_max_results: int = 6
+    serpapi_max_concurrency: int = 8
+    export_output_dir: str = "generated_guides"
+    cors_origins: str = "http://localhost:5173,http://127.0.0.1:5173"
 
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
     """Return cached settings; fail fast if required env vars are missing."""
 
-    api_key = os.getenv("GOOGLE_API_KEY")
+    env = os.environ
+    api_key = env.get("GOOGLE_API_KEY")
     if not api_key:
         raise RuntimeError(
             "Missing GOOGLE_API_KEY environment variable. "
             "Create an API key in Google AI Studio and export it before starting the backend."
         )
 
-    serpapi_key = os.getenv("SERPAPI_API_KEY")
+    serpapi_key = env.get("SERPAPI_API_KEY")
     if not serpapi_key:
         raise RuntimeError(
             "Missing SERPAPI_API_KEY environment variable. "
             "Generate one from https://serpapi.com/ and export it before starting the backend."
         )
 
-    export_dir = os.getenv("EXPORT_OUTPUT_DIR", "generated_guides")
+    export_dir = env.get("EXPORT_OUTPUT_DIR", "generated_guides")
     export_dir_path = Path(export_dir)
     if not export_dir_path.is_absolute():
         export_dir_path = (BASE_DIR / export_dir_path).resolve()
 
     return Settings(
         google_api_key=api_key,
-        gemini_model=os.getenv("GEMINI_MODEL", "gemini-1.5-flash"),
+        gemini_model=env.get("GEMINI_MODEL", "gemini-1.5-flash"),
         serpapi_api_key=serpapi_key,
-        default_language=os.getenv("DEFAULT_LANGUAGE", "it"),
-        search_language=os.getenv("SEARCH_LANGUAGE", "it"),
-        search_country=os.getenv("SEARCH_COUNTRY", "it"),
-        search_max_results=int(os.getenv("SEARCH_MAX_RESULTS", "6")),
+        default_language=env.get("DEFAULT_LANGUAGE", "it"),
+        search_language=env.get("SEARCH_LANGUAGE", "it"),
+        search_country=env.get("SEARCH_COUNTRY", "it"),
+        search_max_results=int(env.get("SEARCH_MAX_RESULTS", "6")),
+        serpapi_max_concurrency=int(env.get("SERPAPI_MAX_CONCURRENCY", "8")),
         export_output_dir=str(export_dir_path),
+        cors_origins=env.get(
+            "CORS_ORIGINS", "http://localhost:5173,http://127.0.0.1:5173"
+        ),
     )
@@ -1,10 +1,12 @@
 ﻿from __future__ import annotations
 
+import json
 from pathlib import Path
 from typing import List
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.config import get_settings
@@ -22,19 +24,26 @@ settings = get_settings()
 app = FastAPI(
     title="LangNerd Videogames Guide",
     description="Backend LangGraph + Gemini per Q&A e guide con export HTML automatico.",
+    default_response_class=ORJSONResponse,
 )
 
+# A concrete origin set lets Starlette short-circuit the per-request origin
+# scan; the previous wildcard also silently disabled credentialed requests in
+# browsers. Wildcard is still honoured (without credentials) if configured.
+_cors_origins = frozenset(
+    origin.strip() for origin in settings.cors_origins.split(",") if origin.strip()
+)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
+    allow_origins=list(_cors_origins),
+    allow_credentials="*" not in _cors_origins,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-export_dir = Path(settings.export_output_dir)
-export_dir.mkdir(parents=True, exist_ok=True)
-app.mount("/generated", StaticFiles(directory=export_dir), name="generated")
+EXPORT_DIR = Path(settings.export_output_dir)
+EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+app.mount("/generated", StaticFiles(directory=EXPORT_DIR), name="generated")
 
 orchestrator = LangGraphOrchestrator(settings)
 
@@ -47,7 +56,7 @@ async def healthcheck():
 @app.post("/api/qa", response_model=QuestionResponse)
 async def answer_question(payload: QuestionPayload) -> QuestionResponse:
     try:
-        result = orchestrator.run_qa(payload.model_dump())
+        result = await orchestrator.run_qa(payload)
     except RuntimeError as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
@@ -58,10 +67,25 @@ async def answer_question(payload: QuestionPayload) -> QuestionResponse:
     )
 
 
+@app.post("/api/qa/stream")
+async def answer_question_stream(payload: QuestionPayload) -> StreamingResponse:
+    """Server-sent-events variant of /api/qa for low time-to-first-token."""
+
+    async def event_stream():
+        try:
+            async for fragment in orchestrator.run_qa_stream(payload):
+                yield f"data: {json.dumps({'delta': fragment}, ensure_ascii=False)}\n\n"
+        except RuntimeError as exc:
+            yield f"data: {json.dumps({'error': str(exc)}, ensure_ascii=False)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @app.post("/api/guide", response_model=GuideResponse)
 async def generate_guide(payload: GuidePayload) -> GuideResponse:
     try:
-        result = orchestrator.run_guide(payload.model_dump())
+        result = await orchestrator.run_guide(payload)
     except RuntimeError as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
@@ -81,7 +105,11 @@ async def generate_guide(payload: GuidePayload) -> GuideResponse:
 
 
 def _build_sources(result: dict) -> List[SourceSchema]:
+    # The source dicts come from the orchestrator and were already shaped by
+    # search_web, so model_construct skips redundant validation per source.
     return [
-        SourceSchema(title=source["title"], url=source["url"], snippet=source.get("snippet"))
+        SourceSchema.model_construct(
+            title=source["title"], url=source["url"], snippet=source.get("snippet")
+        )
         for source in result.get("sources", [])[:6]
     ]
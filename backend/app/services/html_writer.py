@@ -1,107 +1,197 @@
 from __future__ import annotations
 
-import html
-from datetime import datetime
+import io
+import os
+import secrets
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from string import Template
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+
+class StructuredGuide(NamedTuple):
+    """Fixed-schema guide data as produced by the orchestrator.
+
+    Attribute access on a NamedTuple is a C slot load, cheaper than the
+    repeated dict lookups the renderer would otherwise do per section.
+    """
+
+    game_title: str = "Guida videoludica"
+    elevator_pitch: str = ""
+    story_overview: str = ""
+    world_setting: str = ""
+    relationships: str = ""
+    advanced_insights: str = ""
+    main_characters: Tuple[Dict[str, Any], ...] = ()
+    missions_and_tips: Tuple[Dict[str, Any], ...] = ()
+    trophies: Tuple[Dict[str, Any], ...] = ()
+
+    @classmethod
+    def from_mapping(cls, guide: Dict[str, Any]) -> "StructuredGuide":
+        known = {key: value for key, value in guide.items() if key in cls._fields}
+        return cls(**known)
+
+
+# Static page skeleton compiled once at import; only the dynamic parts are
+# substituted per guide instead of re-interpolating the whole <style> block.
+_PAGE_HEAD = Template(
+    """<!DOCTYPE html>
+<html lang="$language">
+<head>
+<meta charset="utf-8" />
+<title>$title - LangNerd</title>
+<style>
+body {
+    font-family: 'Segoe UI', Arial, sans-serif;
+    background-color: #05070f;
+    color: #f5f6fb;
+    margin: 0;
+    padding: 2rem;
+}
+h1 { color: #63d2ff; }
+h2 { color: #ff914d; border-bottom: 1px solid rgba(255,255,255,0.1); padding-bottom: .3rem; }
+.meta { color: #9fb3ff; font-size: 0.9rem; margin-bottom: 2rem; }
+.block { margin-bottom: 1.5rem; }
+ul { padding-left: 1.3rem; }
+li { margin-bottom: .5rem; }
+.muted { color: #a3b2d4; }
+.card { border: 1px solid rgba(255,255,255,0.1); border-radius: 12px; padding: 1rem; margin-bottom: 1rem; }
+</style>
+</head>
+<body>
+<h1>$title</h1>
+<div class="meta">Generato con LangNerd • $generated_at • Lingua: $language_upper</div>
+"""
+)
+
+_PAGE_TAIL = "</body>\n</html>\n"
+
+# Render order for guide sections: (heading, StructuredGuide field, card
+# fields). Text sections carry None card fields; adding or removing a section
+# only touches this table.
+_SECTIONS: Tuple[Tuple[str, str, Optional[Tuple[str, ...]]], ...] = (
+    ("Descrizione sintetica", "elevator_pitch", None),
+    ("Trama completa", "story_overview", None),
+    ("Ambientazione", "world_setting", None),
+    ("Relazioni e fazioni", "relationships", None),
+    ("Personaggi principali", "main_characters", ("name", "role", "description")),
+    ("Missioni e strategie", "missions_and_tips", ("title", "details", "strategy")),
+    ("Trofei PlayStation", "trophies", ("name", "tier", "description", "tips")),
+    ("Approfondimenti avanzati", "advanced_insights", None),
+)
+
+# Single-pass C-level replacement for html.escape, which does one str.replace
+# per special character.
+_ESCAPE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"}
+)
+
+# Filename-hostile characters mapped to underscores when slugging titles.
+_SLUG_TABLE = str.maketrans(" /\\:", "____")
 
 
 def _clean_text(value: Optional[str]) -> str:
     if not value:
         return ""
-    return html.escape(value.strip())
+    return value.strip().translate(_ESCAPE)
 
 
 def _render_section(title: str, body: str) -> str:
-    if not body:
-        return ""
-    return f"""
-    <section class="block">
-        <h2>{title}</h2>
-        {body}
-    </section>
-    """
+    return f'<section class="block"><h2>{title}</h2>{body}</section>' if body else ""
 
 
 class GuideHTMLBuilder:
     """Generate standalone HTML guides that mirror the structured data."""
 
+    # Directories already created this process, so re-instantiating a builder
+    # for the same output dir does not repeat the stat+mkdir syscalls.
+    _created_dirs: set[Path] = set()
+
     def __init__(self, output_dir: str) -> None:
         self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-
-    def build_html(self, guide: Dict[str, Any], language: str = "it") -> str:
-        title = _clean_text(guide.get("game_title") or "Guida videoludica")
-        generated_at = datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
-        html_content = f"""
-        <!DOCTYPE html>
-        <html lang="{language}">
-        <head>
-            <meta charset="utf-8" />
-            <title>{title} - LangNerd</title>
-            <style>
-                body {{
-                    font-family: 'Segoe UI', Arial, sans-serif;
-                    background-color: #05070f;
-                    color: #f5f6fb;
-                    margin: 0;
-                    padding: 2rem;
-                }}
-                h1 {{ color: #63d2ff; }}
-                h2 {{ color: #ff914d; border-bottom: 1px solid rgba(255,255,255,0.1); padding-bottom: .3rem; }}
-                .meta {{ color: #9fb3ff; font-size: 0.9rem; margin-bottom: 2rem; }}
-                .block {{ margin-bottom: 1.5rem; }}
-                ul {{ padding-left: 1.3rem; }}
-                li {{ margin-bottom: .5rem; }}
-                .muted {{ color: #a3b2d4; }}
-                .card {{ border: 1px solid rgba(255,255,255,0.1); border-radius: 12px; padding: 1rem; margin-bottom: 1rem; }}
-            </style>
-        </head>
-        <body>
-            <h1>{title}</h1>
-            <div class="meta">Generato con LangNerd • {generated_at} • Lingua: {language.upper()}</div>
-            {self._render_text_block("Descrizione sintetica", guide.get("elevator_pitch"))}
-            {self._render_text_block("Trama completa", guide.get("story_overview"))}
-            {self._render_text_block("Ambientazione", guide.get("world_setting"))}
-            {self._render_text_block("Relazioni e fazioni", guide.get("relationships"))}
-            {self._render_list_block("Personaggi principali", guide.get("main_characters"), ["name", "role", "description"])}
-            {self._render_list_block("Missioni e strategie", guide.get("missions_and_tips"), ["title", "details", "strategy"])}
-            {self._render_list_block("Trofei PlayStation", guide.get("trophies"), ["name", "tier", "description", "tips"])}
-            {self._render_text_block("Approfondimenti avanzati", guide.get("advanced_insights"))}
-        </body>
-        </html>
-        """
-
-        filename = f"{title.lower().replace(' ', '_')}_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.html"
+        if self.output_dir not in GuideHTMLBuilder._created_dirs:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            GuideHTMLBuilder._created_dirs.add(self.output_dir)
+
+    def build_html(
+        self,
+        guide: Union[StructuredGuide, Dict[str, Any]],
+        language: str = "it",
+    ) -> str:
+        if not isinstance(guide, StructuredGuide):
+            guide = StructuredGuide.from_mapping(guide)
+        title = _clean_text(guide.game_title or "Guida videoludica")
+        now = datetime.now(timezone.utc)
+        generated_at = now.strftime("%Y-%m-%d %H:%M UTC")
+        # A random suffix instead of a second-resolution timestamp: collision
+        # free for concurrent exports of the same title and cheaper than a
+        # second strftime call.
+        slug = title[:48].lower().translate(_SLUG_TABLE)
+        filename = f"{slug}-{secrets.token_hex(6)}.html"
         output_path = self.output_dir / filename
-        output_path.write_text(html_content, encoding="utf-8")
+        # Stream section by section instead of materializing the full page in
+        # memory; each chunk is encoded and released while the file object
+        # handles buffering. Writing to a sibling temp file and renaming keeps
+        # the final path atomic — a crash mid-write never leaves a partial
+        # guide visible under /generated.
+        tmp_path = output_path.with_suffix(".html.tmp")
+        with tmp_path.open("w", encoding="utf-8", buffering=64 * 1024) as handle:
+            handle.write(
+                _PAGE_HEAD.substitute(
+                    title=title,
+                    language=language,
+                    language_upper=language.upper(),
+                    generated_at=generated_at,
+                )
+            )
+            for heading, field, card_fields in _SECTIONS:
+                value = getattr(guide, field)
+                if card_fields is None:
+                    handle.write(self._render_text_block(heading, value))
+                else:
+                    handle.write(self._render_list_block(heading, value, card_fields))
+            handle.write(_PAGE_TAIL)
+        os.replace(tmp_path, output_path)
         return str(output_path)
 
     def _render_text_block(self, title: str, content: Optional[str]) -> str:
-        cleaned = content.strip() if isinstance(content, str) else ""
-        if not cleaned:
+        if not isinstance(content, str):
             return ""
-        return _render_section(title, cleaned)
+        return _render_section(title, content.strip())
 
     def _render_list_block(
         self,
         title: str,
         items: Optional[Iterable[Dict[str, Any]]],
-        fields: List[str],
+        fields: Iterable[str],
     ) -> str:
         if not items:
             return ""
-        rows = []
+        buf = io.StringIO()
+        write = buf.write
+        labels = [(field, field.replace("_", " ").title()) for field in fields]
         for item in items:
-            card_lines = []
-            for field in fields:
+            card_start = buf.tell()
+            write('<div class="card">')
+            has_fields = False
+            for field, label in labels:
                 value = item.get(field)
                 if not value:
                     continue
-                label = field.replace("_", " ").title()
-                card_lines.append(f"<p><strong>{label}:</strong> {value}</p>")
-            if card_lines:
-                rows.append(f'<div class="card">{"".join(card_lines)}</div>')
-        if not rows:
-            return ""
-        return _render_section(title, "".join(rows))
+                text = str(value)
+                if "<" not in text:
+                    # Plain fields (names, titles, tiers) arrive unescaped;
+                    # rich fields were already rendered to HTML upstream.
+                    text = text.translate(_ESCAPE)
+                write("<p><strong>")
+                write(label)
+                write(":</strong> ")
+                write(text)
+                write("</p>")
+                has_fields = True
+            if has_fields:
+                write("</div>")
+            else:
+                buf.seek(card_start)
+                buf.truncate()
+        return _render_section(title, buf.getvalue())
@@ -1,16 +1,192 @@
 from __future__ import annotations
 
+import asyncio
 import html
 import json
 import re
-from typing import Any, Dict, List, Literal, Optional, TypedDict
+from functools import lru_cache
+from string import Template
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple, TypedDict
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib json keeps things working
+    orjson = None
 
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.graph import END, START, StateGraph
 
 from app.config import Settings, get_settings
+from app.schemas import GuidePayload, QuestionPayload
 from app.services.html_writer import GuideHTMLBuilder
-from app.services.search import search_web
+from app.services.llm_cache import LLMCache, TTLCache
+from app.services.search import search_web_async
+
+
+# Compiled once at import: these run dozens of times per guide (once per
+# normalized text field), so even re's internal pattern cache lookup adds up.
+_CITE_RE = re.compile(r"\[(\d+)\]")
+_CITE_GROUP_RE = re.compile(r"\[(\s*\d+(?:\s*[, ]\s*\d+)+\s*)\]")
+_SPLIT_RE = re.compile(r"[, ]+")
+_FENCE_HEAD_RE = re.compile(r"^```[a-zA-Z]*\s*")
+_FENCE_TAIL_RE = re.compile(r"\s*```$")
+
+# Separator used to fuse many small fields into one linkification pass. NUL
+# is not whitespace, so neither the \s* in the citation-group pattern nor
+# str.strip() can bridge or swallow a field boundary.
+_FIELD_SENTINEL = "\x00"
+
+
+# Prompt skeletons built once at import; string.Template leaves the literal
+# JSON braces alone and only swaps in the per-request fields, instead of
+# re-concatenating dozens of string fragments per prompt.
+_CLASSIFY_TMPL = Template(
+    "Agisci come orchestratore senior di LangNerd, piattaforma per guide sui videogiochi. "
+    "Analizza la richiesta seguente e scegli se attivare la modalità 'qa' (risposta puntuale) "
+    "oppure 'guide' (documento strutturato con trama, missioni, trofei). "
+    "Restituisci SOLO JSON valido con le chiavi precise: "
+    '{"mode": "qa"|"guide", "language": "<codice ISO-639-1>", '
+    '"game": "<titolo o null>", "search_queries": ["query 1", "..."]}. '
+    "Regole: 1) Se l'utente chiede tutorial completi, panoramiche o PDF -> mode='guide'; "
+    "2) imposta language nella lingua in cui l'utente scrive (fallback 'it'); "
+    "3) genera almeno 3 query complementari (titolo + trama, missioni, trofei/focus) senza duplicati; "
+    "4) non aggiungere testo fuori dal JSON."
+    "\nDomanda utente: $query"
+    "\nGioco indicato: $game"
+    "\nFocus richiesto: $focus"
+)
+
+_ANSWER_TMPL = Template(
+    "Tu sei LangNerd Response Engine, specialista di videogiochi. "
+    "Rispondi in $language seguendo queste regole rigorose:\n"
+    "1) Usa SOLO i dati verificabili nel contesto fornito; se mancano info dichiaralo.\n"
+    "2) Inizia con un breve executive summary (2 frasi max) focalizzato sul quesito.\n"
+    "3) Fornisci istruzioni operative con passaggi numerati e consigli pratici strettamente inerenti.\n"
+    "4) Evidenzia eventuali requisiti (livello, oggetti, build consigliate) in una lista puntata.\n"
+    "5) Chiudi ogni paragrafo citando almeno una fonte nel formato [n] coerente con gli ID sottostanti.\n"
+    "6) Restituisci l'intera risposta come HTML semantico valido (usa <section>, <ol>, <ul>, <li>, <strong>, ecc.).\n"
+    "7) Non inventare URL o informazioni; ignora contenuti fuori tema.\n"
+    "\nContesto verificato:\n$context_text\n"
+    "\nDomanda finale (mantieni la risposta strettamente inerente): $query"
+)
+
+_GUIDE_TMPL = Template(
+    "Agisci come redattore capo di LangNerd e costruisci una guida completa basata sui risultati "
+    "di ricerca JSON forniti. Rispetta rigorosamente queste linee guida:\n"
+    "- Usa SOLO informazioni corroborate dalle fonti; se mancano dati, scrivi 'Dato non disponibile'.\n"
+    "- Mantieni il tono professionale ma accessibile, sempre in lingua $language.\n"
+    "- Story_overview deve essere un riassunto narrativo estremamente dettagliato (minimo 200 parole) "
+    "che copra contesto, eventi principali, colpi di scena e conseguenze.\n"
+    "- Missions_and_tips deve contenere almeno 6 voci con titoli descrittivi: ogni voce include dettagli "
+    "della missione e una strategia operativa passo-passo con suggerimenti di build/oggetti.\n"
+    "- Trophies deve contenere almeno 10 trofei PlayStation con tier corretto, descrizione dell'obiettivo "
+    "e consigli concreti su come ottenerli rapidamente (citare farming spot, requisiti, condizioni missabili).\n"
+    "- Main_characters deve includere protagonisti e antagonisti principali con ruolo nella storia e "
+    "sinergie o conflitti rilevanti.\n"
+    "- Relationships e advanced_insights devono evidenziare fazioni, alleanze, controstrategie, build meta.\n"
+    "- Restituisci esclusivamente JSON valido con la seguente struttura esatta:\n"
+    "{\n"
+    '  "game_title": str,\n'
+    '  "elevator_pitch": str,\n'
+    '  "story_overview": str,\n'
+    '  "world_setting": str,\n'
+    '  "main_characters": [{"name": str, "description": str, "role": str}],\n'
+    '  "relationships": str,\n'
+    '  "missions_and_tips": [{"title": str, "details": str, "strategy": str}],\n'
+    '  "trophies": [{"name": str, "tier": str, "description": str, "tips": str}],\n'
+    '  "advanced_insights": str\n'
+    "}\n"
+    "Fonti JSON (campi: i=indice da usare nelle citazioni [n], t=titolo, u=URL, s=estratto):\n"
+    "$serialized\n"
+    "Gioco di riferimento: $game"
+)
+
+
+def _canonical_url(url: str) -> str:
+    """Normalize a URL for dedup: casefold host, drop fragments, tracking
+    params and trailing slashes so near-duplicates collapse to one entry."""
+
+    try:
+        parts = urlparse(url)
+    except ValueError:
+        return url
+    query = urlencode(
+        [
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith("utm_")
+        ]
+    )
+    path = parts.path.rstrip("/")
+    return urlunparse(
+        (parts.scheme.lower(), parts.netloc.lower(), path, parts.params, query, "")
+    )
+
+
+def _json_dumps_compact(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _json_loads(data: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _expand_reference_groups(text: str) -> str:
+    def repl(match: re.Match[str]) -> str:
+        content = match.group(1)
+        numbers = [num for num in _SPLIT_RE.split(content.strip()) if num]
+        if not numbers:
+            return match.group(0)
+        return "".join(f"[{num}]" for num in numbers)
+
+    return _CITE_GROUP_RE.sub(repl, text)
+
+
+def _linkify_uncached(html_text: str, urls: Tuple[str, ...]) -> str:
+    expanded = _expand_reference_groups(html_text)
+
+    def repl(match: re.Match[str]) -> str:
+        try:
+            idx = int(match.group(1))
+        except ValueError:
+            return match.group(0)
+        if 1 <= idx <= len(urls):
+            url = html.escape(urls[idx - 1])
+            if url:
+                return (
+                    f'<sup><a href="{url}" target="_blank" rel="noreferrer">[{idx}]</a></sup>'
+                )
+        return match.group(0)
+
+    return _CITE_RE.sub(repl, expanded)
+
+
+# Memoized layer for the short, repetitive inputs (answer fragments and the
+# per-field fallback); whole-guide batches bypass it via _linkify_uncached so
+# one-shot multi-kilobyte blobs never pin cache slots.
+_linkify_cached = lru_cache(maxsize=512)(_linkify_uncached)
+
+
+@lru_cache(maxsize=1024)
+def _build_queries_cached(
+    question: str, game: str, focus: str, include_trophies: bool
+) -> Tuple[str, ...]:
+    queries = [question]
+    if game:
+        queries.append(f"{game} trama completa")
+        queries.append(f"{game} missioni guida")
+    if include_trophies and game:
+        queries.append(f"{game} lista trofei PlayStation")
+    if focus:
+        queries.append(f"{game} {focus}")
+    # dict.fromkeys dedupes while preserving order, so near-duplicate
+    # queries never reach SerpAPI twice.
+    return tuple(dict.fromkeys(query.strip() for query in queries if query and query.strip()))
 
 
 class GuideState(TypedDict, total=False):
@@ -21,6 +197,7 @@ class GuideState(TypedDict, total=False):
     language: str
     mode: Literal["qa", "guide"]
     search_queries: List[str]
+    speculative_results: List[Dict[str, str]]
     search_results: List[Dict[str, str]]
     structured_guide: Dict[str, Any]
     answer: str
@@ -39,7 +216,21 @@ class LangGraphOrchestrator:
             convert_system_message_to_human=True,
             google_api_key=self.settings.google_api_key,
         )
+        # Dedicated instance in Gemini's native JSON mode: the model is
+        # constrained to emit valid JSON, so the fence-stripping regexes
+        # become a rarely-hit fallback instead of the happy path.
+        self.llm_json = ChatGoogleGenerativeAI(
+            model=self.settings.gemini_model,
+            temperature=0.2,
+            convert_system_message_to_human=True,
+            google_api_key=self.settings.google_api_key,
+            response_mime_type="application/json",
+        )
         self.html_builder = GuideHTMLBuilder(self.settings.export_output_dir)
+        self.llm_cache = LLMCache(model=self.settings.gemini_model, temperature=0.2)
+        # Classifier output is deterministic enough at this temperature for
+        # repeated (query, game, focus) triples to skip the LLM entirely.
+        self._classify_cache = TTLCache(maxsize=1024, ttl=3600)
         self.graph = self._build_graph()
 
     def _build_graph(self):
@@ -60,28 +251,55 @@ class LangGraphOrchestrator:
         return workflow.compile()
 
     # ---------- graph nodes ----------
-    def _classify_request(self, state: GuideState) -> GuideState:
+    async def _classify_request(self, state: GuideState) -> GuideState:
+        # Nodes return only their delta; LangGraph merges it into the state,
+        # sparing a full dict copy per node.
         if state.get("mode"):
-            return state
-
-        prompt = (
-            "Agisci come orchestratore senior di LangNerd, piattaforma per guide sui videogiochi. "
-            "Analizza la richiesta seguente e scegli se attivare la modalità 'qa' (risposta puntuale) "
-            "oppure 'guide' (documento strutturato con trama, missioni, trofei). "
-            "Restituisci SOLO JSON valido con le chiavi precise: "
-            '{"mode": "qa"|"guide", "language": "<codice ISO-639-1>", '
-            '"game": "<titolo o null>", "search_queries": ["query 1", "..."]}. '
-            "Regole: 1) Se l'utente chiede tutorial completi, panoramiche o PDF -> mode='guide'; "
-            "2) imposta language nella lingua in cui l'utente scrive (fallback 'it'); "
-            "3) genera almeno 3 query complementari (titolo + trama, missioni, trofei/focus) senza duplicati; "
-            "4) non aggiungere testo fuori dal JSON."
-            f"\nDomanda utente: {state.get('query')}"
-            f"\nGioco indicato: {state.get('game') or 'non specificato'}"
-            f"\nFocus richiesto: {state.get('focus') or 'nessuno'}"
-        )
+            return {}
+
+        raw_query = state.get("query") or ""
+        memo_key = (raw_query, state.get("game") or "", state.get("focus") or "")
+        result = self._classify_cache.get(memo_key)
+
+        speculative: Optional[asyncio.Task] = None
+        if result is None:
+            # Speculatively search the raw query while the classifier
+            # round-trip is in flight; if the classifier keeps that query we
+            # get its results for free, otherwise the task is cancelled.
+            if raw_query:
+                speculative = asyncio.create_task(
+                    search_web_async(
+                        raw_query,
+                        api_key=self.settings.serpapi_api_key,
+                        max_results=self.settings.search_max_results,
+                        country=self.settings.search_country,
+                        language=state.get("language") or self.settings.search_language,
+                    )
+                )
 
-        result = self._invoke_json_llm(prompt)
-        merged = state.copy()
+            prompt = _CLASSIFY_TMPL.substitute(
+                query=state.get("query"),
+                game=state.get("game") or "non specificato",
+                focus=state.get("focus") or "nessuno",
+            )
+
+            try:
+                result = await asyncio.to_thread(
+                    self._invoke_json_llm,
+                    prompt,
+                    cache_namespace=f"classify:{state.get('language') or ''}",
+                )
+            except BaseException:
+                # Without this the speculative task would be orphaned on a
+                # classifier failure: a billed SerpAPI call whose result is
+                # never retrieved.
+                if speculative is not None:
+                    speculative.cancel()
+                raise
+            if isinstance(result, dict):
+                self._classify_cache.set(memo_key, result)
+
+        merged: GuideState = {}
         if isinstance(result, dict):
             merged["mode"] = result.get("mode", "qa")  # type: ignore
             merged["language"] = result.get("language") or self.settings.default_language
@@ -91,32 +309,60 @@ class LangGraphOrchestrator:
             merged["mode"] = "qa"
             merged["language"] = state.get("language") or self.settings.default_language
             merged["search_queries"] = [state.get("query", "")]
+
+        if speculative is not None:
+            if raw_query in (merged.get("search_queries") or []):
+                try:
+                    merged["speculative_results"] = await speculative
+                except Exception:  # pragma: no cover - same failure modes as the node itself
+                    pass
+            else:
+                speculative.cancel()
         return merged
 
-    def _run_search(self, state: GuideState) -> GuideState:
+    async def _run_search(self, state: GuideState) -> GuideState:
         queries = state.get("search_queries") or [state.get("query", "")]
-        aggregated: List[Dict[str, str]] = []
-        seen = set()
         language = state.get("language") or self.settings.search_language
-        for query in queries:
-            if not query:
-                continue
-            results = search_web(
+        speculative = state.get("speculative_results")
+        raw_query = state.get("query")
+        # Queries are independent: fan them out concurrently so the node is as
+        # slow as the slowest single SerpAPI call instead of their sum. The
+        # raw query is skipped when the classifier already searched it
+        # speculatively.
+        tasks = [
+            search_web_async(
                 query,
                 api_key=self.settings.serpapi_api_key,
                 max_results=self.settings.search_max_results,
                 country=self.settings.search_country,
                 language=language,
             )
+            for query in queries
+            if query and not (speculative and query == raw_query)
+        ]
+        results_lists = await asyncio.gather(*tasks, return_exceptions=True)
+
+        aggregated: List[Dict[str, str]] = []
+        seen: set[str] = set()
+        seen_add = seen.add
+        for res in speculative or []:
+            key = _canonical_url(res["url"])
+            if key not in seen:
+                seen_add(key)
+                aggregated.append(res)
+        for results in results_lists:
+            if isinstance(results, BaseException):
+                continue
             for res in results:
-                if res["url"] in seen:
+                key = _canonical_url(res["url"])
+                if key in seen:
                     continue
-                seen.add(res["url"])
+                seen_add(key)
                 aggregated.append(res)
 
-        return {**state, "search_results": aggregated, "sources": aggregated[:6]}
+        return {"search_results": aggregated, "sources": aggregated[:6]}
 
-    def _generate_answer(self, state: GuideState) -> GuideState:
+    def _build_answer_prompt(self, state: GuideState) -> str:
         results = state.get("search_results") or []
         language = state.get("language") or self.settings.default_language
         context_blocks = []
@@ -126,60 +372,55 @@ class LangGraphOrchestrator:
             )
         context_text = "\n\n".join(context_blocks) if context_blocks else "Nessuna fonte verificata."
 
-        sources = state.get("sources") or state.get("search_results") or []
-        prompt = (
-            "Tu sei LangNerd Response Engine, specialista di videogiochi. "
-            f"Rispondi in {language} seguendo queste regole rigorose:\n"
-            "1) Usa SOLO i dati verificabili nel contesto fornito; se mancano info dichiaralo.\n"
-            "2) Inizia con un breve executive summary (2 frasi max) focalizzato sul quesito.\n"
-            "3) Fornisci istruzioni operative con passaggi numerati e consigli pratici strettamente inerenti.\n"
-            "4) Evidenzia eventuali requisiti (livello, oggetti, build consigliate) in una lista puntata.\n"
-            "5) Chiudi ogni paragrafo citando almeno una fonte nel formato [n] coerente con gli ID sottostanti.\n"
-            "6) Restituisci l'intera risposta come HTML semantico valido (usa <section>, <ol>, <ul>, <li>, <strong>, ecc.).\n"
-            "7) Non inventare URL o informazioni; ignora contenuti fuori tema.\n"
-            f"\nContesto verificato:\n{context_text}\n"
-            f"\nDomanda finale (mantieni la risposta strettamente inerente): {state.get('query') or ''}"
+        return _ANSWER_TMPL.substitute(
+            language=language,
+            context_text=context_text,
+            query=state.get("query") or "",
         )
 
-        response = self.llm.invoke(prompt)
-        answer_html = self._ensure_html(self._coerce_content(response))
+    def _generate_answer(self, state: GuideState) -> GuideState:
+        language = state.get("language") or self.settings.default_language
+        sources = state.get("sources") or state.get("search_results") or []
+        prompt = self._build_answer_prompt(state)
+
+        # Cache the raw completion (not the linkified HTML): identical prompts
+        # imply identical context blocks, while citation links depend on the
+        # per-request sources list.
+        cache_key = self.llm_cache.key_for(prompt, namespace=f"answer:{language}")
+        raw_answer = self.llm_cache.get(cache_key)
+        if raw_answer is None:
+            response = self.llm.invoke(prompt)
+            raw_answer = self._coerce_content(response)
+            # Never cache empty completions (e.g. safety blocks): they must
+            # stay retryable instead of being served for the whole TTL.
+            if raw_answer:
+                self.llm_cache.set(cache_key, raw_answer)
+
+        answer_html = self._ensure_html(raw_answer)
         linked = self._linkify_citations(answer_html, sources)
-        return {**state, "answer": linked}
+        return {"answer": linked}
 
     def _generate_guide_structure(self, state: GuideState) -> GuideState:
         results = state.get("search_results") or []
         language = state.get("language") or self.settings.default_language
-        serialized = json.dumps(results, ensure_ascii=False)
-
-        prompt = (
-            "Agisci come redattore capo di LangNerd e costruisci una guida completa basata sui risultati "
-            "di ricerca JSON forniti. Rispetta rigorosamente queste linee guida:\n"
-            "- Usa SOLO informazioni corroborate dalle fonti; se mancano dati, scrivi 'Dato non disponibile'.\n"
-            "- Mantieni il tono professionale ma accessibile, sempre in lingua "
-            f"{language}.\n"
-            "- Story_overview deve essere un riassunto narrativo estremamente dettagliato (minimo 200 parole) "
-            "che copra contesto, eventi principali, colpi di scena e conseguenze.\n"
-            "- Missions_and_tips deve contenere almeno 6 voci con titoli descrittivi: ogni voce include dettagli "
-            "della missione e una strategia operativa passo-passo con suggerimenti di build/oggetti.\n"
-            "- Trophies deve contenere almeno 10 trofei PlayStation con tier corretto, descrizione dell'obiettivo "
-            "e consigli concreti su come ottenerli rapidamente (citare farming spot, requisiti, condizioni missabili).\n"
-            "- Main_characters deve includere protagonisti e antagonisti principali con ruolo nella storia e "
-            "sinergie o conflitti rilevanti.\n"
-            "- Relationships e advanced_insights devono evidenziare fazioni, alleanze, controstrategie, build meta.\n"
-            "- Restituisci esclusivamente JSON valido con la seguente struttura esatta:\n"
-            "{\n"
-            '  "game_title": str,\n'
-            '  "elevator_pitch": str,\n'
-            '  "story_overview": str,\n'
-            '  "world_setting": str,\n'
-            '  "main_characters": [{"name": str, "description": str, "role": str}],\n'
-            '  "relationships": str,\n'
-            '  "missions_and_tips": [{"title": str, "details": str, "strategy": str}],\n'
-            '  "trophies": [{"name": str, "tier": str, "description": str, "tips": str}],\n'
-            '  "advanced_insights": str\n'
-            "}\n"
-            f"Fonti JSON:\n{serialized}\n"
-            f"Gioco di riferimento: {state.get('game') or 'non specificato'}"
+        # Compact projection instead of the raw result dicts: short keys and
+        # truncated snippets cut the prompt's input tokens roughly in half
+        # while keeping the citation indices stable.
+        compact = [
+            {
+                "i": idx,
+                "t": (item.get("title") or "")[:120],
+                "u": item.get("url") or "",
+                "s": (item.get("snippet") or "")[:240],
+            }
+            for idx, item in enumerate(results[:20], start=1)
+        ]
+        serialized = _json_dumps_compact(compact)
+
+        prompt = _GUIDE_TMPL.substitute(
+            language=language,
+            serialized=serialized,
+            game=state.get("game") or "non specificato",
         )
 
         structured = self._invoke_json_llm(prompt)
@@ -206,33 +447,55 @@ class LangGraphOrchestrator:
                 fallback_title=state.get("game"),
                 sources=sources,
             )
-        return {**state, "structured_guide": structured}
+        return {"structured_guide": structured}
 
 
     # ---------- routing ----------
     def _route_after_search(self, state: GuideState) -> str:
         return "guide" if state.get("mode") == "guide" else "answer"
 
-    def _generate_export(self, state: GuideState) -> GuideState:
+    async def _generate_export(self, state: GuideState) -> GuideState:
         guide = state.get("structured_guide") or {}
         language = state.get("language") or self.settings.default_language
-        export_path = self.html_builder.build_html(guide, language=language)
-        return {**state, "export_path": export_path}
+        # File I/O belongs off the event loop so concurrent guide exports do
+        # not serialize behind each other's disk writes.
+        export_path = await asyncio.to_thread(
+            self.html_builder.build_html, guide, language=language
+        )
+        return {"export_path": export_path}
 
     # ---------- helpers ----------
-    def _invoke_json_llm(self, prompt: str) -> Any:
-        response = self.llm.invoke(
+    def _invoke_json_llm(self, prompt: str, *, cache_namespace: Optional[str] = None) -> Any:
+        # Guide-structure prompts pass no namespace so their long-form output
+        # is never served stale; classification is deterministic enough at
+        # temperature 0.2 to reuse.
+        cache_key = None
+        if cache_namespace is not None:
+            cache_key = self.llm_cache.key_for(prompt, namespace=cache_namespace)
+            cached = self.llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        response = self.llm_json.invoke(
             [
                 {"role": "system", "content": "Rispondi solo con JSON valido."},
                 {"role": "user", "content": prompt},
             ]
         )
         raw_content = self._coerce_content(response)
-        candidate = self._extract_json_payload(raw_content)
+        # ValueError covers both json.JSONDecodeError and orjson's variant.
         try:
-            return json.loads(candidate)
-        except json.JSONDecodeError:
-            return None
+            parsed = _json_loads(raw_content)
+        except ValueError:
+            # JSON mode occasionally still wraps output (e.g. in fences);
+            # fall back to isolating the object before giving up.
+            try:
+                parsed = _json_loads(self._extract_json_payload(raw_content))
+            except ValueError:
+                return None
+        if cache_key is not None and parsed is not None:
+            self.llm_cache.set(cache_key, parsed)
+        return parsed
 
     def _coerce_content(self, response: Any) -> str:
         content = response.content if hasattr(response, "content") else str(response)
@@ -246,11 +509,19 @@ class LangGraphOrchestrator:
             content = "".join(text_fragments)
         return str(content)
 
-    def _ensure_html(self, text: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _ensure_html(text: str) -> str:
+        # Sparse LLM output repeats fallbacks like "Dato non disponibile."
+        # across dozens of fields; memoizing makes those repeats free.
         stripped = (text or "").strip()
         if not stripped:
             return "<p></p>"
-        if re.search(r"<[a-zA-Z][\s\S]*?>", stripped):
+        # "<" followed by a letter is enough to treat the input as HTML;
+        # str.find keeps the common plain-text case (fallback strings, short
+        # fields) off the regex engine entirely.
+        lt = stripped.find("<")
+        if lt >= 0 and lt + 1 < len(stripped) and stripped[lt + 1].isalpha():
             return stripped
         paragraphs = [
             f"<p>{html.escape(line.strip())}</p>"
@@ -274,12 +545,20 @@ class LangGraphOrchestrator:
             "relationships",
             "advanced_insights",
         ]
-        for field in text_fields:
-            value = normalized.get(field) or "Dato non disponibile."
-            normalized[field] = self._linkify_citations(
-                self._ensure_html(str(value)),
-                sources,
-            )
+
+        # Every rich field goes through the same _ensure_html + linkify
+        # treatment with the same sources, so collect them all first and run
+        # the citation pass once over the batch instead of per field.
+        pending: List[str] = []
+
+        def enqueue(value: Any) -> int:
+            pending.append(self._ensure_html(str(value)))
+            return len(pending) - 1
+
+        field_slots = {
+            field: enqueue(normalized.get(field) or "Dato non disponibile.")
+            for field in text_fields
+        }
 
         def sanitize_list(items, factory):
             safe_items: List[Dict[str, Any]] = []
@@ -294,14 +573,8 @@ class LangGraphOrchestrator:
             normalized.get("main_characters"),
             lambda char: {
                 "name": char.get("name") or "Personaggio sconosciuto",
-                "description": self._linkify_citations(
-                    self._ensure_html(char.get("description") or "Dato non disponibile."),
-                    sources,
-                ),
-                "role": self._linkify_citations(
-                    self._ensure_html(char.get("role") or "Dato non disponibile."),
-                    sources,
-                ),
+                "description": enqueue(char.get("description") or "Dato non disponibile."),
+                "role": enqueue(char.get("role") or "Dato non disponibile."),
             },
         )
 
@@ -309,14 +582,8 @@ class LangGraphOrchestrator:
             normalized.get("missions_and_tips"),
             lambda mission: {
                 "title": mission.get("title") or "Missione senza titolo",
-                "details": self._linkify_citations(
-                    self._ensure_html(mission.get("details") or "Dato non disponibile."),
-                    sources,
-                ),
-                "strategy": self._linkify_citations(
-                    self._ensure_html(mission.get("strategy") or "Dato non disponibile."),
-                    sources,
-                ),
+                "details": enqueue(mission.get("details") or "Dato non disponibile."),
+                "strategy": enqueue(mission.get("strategy") or "Dato non disponibile."),
             },
         )
 
@@ -325,103 +592,180 @@ class LangGraphOrchestrator:
             lambda trophy: {
                 "name": trophy.get("name") or "Trofeo sconosciuto",
                 "tier": trophy.get("tier") or trophy.get("rarity") or "?",
-                "description": self._linkify_citations(
-                    self._ensure_html(trophy.get("description") or "Dato non disponibile."),
-                    sources,
-                ),
-                "tips": self._linkify_citations(
-                    self._ensure_html(trophy.get("tips") or trophy.get("strategy") or "Dato non disponibile."),
-                    sources,
-                ),
+                "description": enqueue(trophy.get("description") or "Dato non disponibile."),
+                "tips": enqueue(trophy.get("tips") or trophy.get("strategy") or "Dato non disponibile."),
             },
         )
 
+        linked = self._linkify_many(pending, sources)
+        for field, slot in field_slots.items():
+            normalized[field] = linked[slot]
+        for char in normalized["main_characters"]:
+            char["description"] = linked[char["description"]]
+            char["role"] = linked[char["role"]]
+        for mission in normalized["missions_and_tips"]:
+            mission["details"] = linked[mission["details"]]
+            mission["strategy"] = linked[mission["strategy"]]
+        for trophy in normalized["trophies"]:
+            trophy["description"] = linked[trophy["description"]]
+            trophy["tips"] = linked[trophy["tips"]]
+
         normalized["game_title"] = normalized.get("game_title") or fallback_title or "Guida videoludica"
         return normalized
 
+    def _linkify_many(self, texts: List[str], sources: List[Dict[str, str]]) -> List[str]:
+        """Run a single citation pass over many fields sharing one sources list."""
+
+        if not texts:
+            return []
+        joined = _FIELD_SENTINEL.join(
+            text.replace(_FIELD_SENTINEL, " ") for text in texts
+        )
+        urls = tuple(source.get("url", "") for source in sources)
+        linked = _linkify_uncached(joined, urls).split(_FIELD_SENTINEL)
+        if len(linked) != len(texts):
+            # A substitution touched a field boundary; fall back to the exact
+            # per-field pass rather than scattering misaligned results.
+            return [self._linkify_citations(text, sources) for text in texts]
+        return linked
+
     def _linkify_citations(self, html_text: str, sources: List[Dict[str, str]]) -> str:
         if not html_text:
             return html_text
-
-        expanded = self._expand_reference_groups(html_text)
-        pattern = re.compile(r"\[(\d+)\]")
-
-        def repl(match: re.Match[str]) -> str:
-            try:
-                idx = int(match.group(1))
-            except ValueError:
-                return match.group(0)
-            if 1 <= idx <= len(sources):
-                url = html.escape(sources[idx - 1].get("url", ""))
-                if url:
-                    return (
-                        f'<sup><a href="{url}" target="_blank" rel="noreferrer">[{idx}]</a></sup>'
-                    )
-            return match.group(0)
-
-        return pattern.sub(repl, expanded)
-
-    def _expand_reference_groups(self, text: str) -> str:
-        pattern = re.compile(r"\[(\s*\d+(?:\s*[, ]\s*\d+)+\s*)\]")
-
-        def repl(match: re.Match[str]) -> str:
-            content = match.group(1)
-            numbers = [num for num in re.split(r"[, ]+", content.strip()) if num]
-            if not numbers:
-                return match.group(0)
-            return "".join(f"[{num}]" for num in numbers)
-
-        return pattern.sub(repl, text)
+        # Only the URLs matter for the substitution, and as a tuple they make
+        # a hashable cache key — repeated fields against the same sources
+        # (common with sparse guides) skip both regex passes entirely.
+        urls = tuple(source.get("url", "") for source in sources)
+        return _linkify_cached(html_text, urls)
 
     def _extract_json_payload(self, text: str) -> str:
-        """Strip markdown fences and isolate the JSON object for robust parsing."""
+        """Strip markdown fences and isolate the first balanced JSON object.
+
+        A linear bracket-depth scan replaces the old greedy ``\\{.*\\}``
+        regex, which could swallow everything between the first ``{`` and the
+        last ``}`` of the payload and choked on braces inside string
+        literals.
+        """
 
         cleaned = text.strip()
         if cleaned.startswith("```"):
-            cleaned = re.sub(r"^```[a-zA-Z]*\s*", "", cleaned)
-            cleaned = re.sub(r"\s*```$", "", cleaned)
-        match = re.search(r"\{.*\}", cleaned, re.DOTALL)
-        if match:
-            return match.group(0)
-        return cleaned
+            cleaned = _FENCE_HEAD_RE.sub("", cleaned)
+            cleaned = _FENCE_TAIL_RE.sub("", cleaned)
+
+        start = cleaned.find("{")
+        if start < 0:
+            return cleaned
+        depth = 0
+        in_string = False
+        escaped = False
+        for pos in range(start, len(cleaned)):
+            char = cleaned[pos]
+            if escaped:
+                escaped = False
+                continue
+            if char == "\\":
+                escaped = True
+                continue
+            if char == '"':
+                in_string = not in_string
+                continue
+            if in_string:
+                continue
+            if char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    return cleaned[start : pos + 1]
+        return cleaned[start:]
 
     # ---------- public API ----------
-    def run_qa(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    async def run_qa(self, payload: QuestionPayload) -> Dict[str, Any]:
         initial_state: GuideState = {
-            "query": payload.get("question") or payload.get("query") or "",
-            "game": payload.get("game"),
-            "focus": payload.get("focus"),
-            "language": payload.get("language") or self.settings.default_language,
+            "query": payload.question or "",
+            "game": payload.game,
+            "focus": payload.focus,
+            "language": payload.language or self.settings.default_language,
             "mode": "qa",
             "search_queries": self._build_queries(payload),
         }
-        return self.graph.invoke(initial_state)
-
-    def run_guide(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        base_query = f"videogioco {payload.get('game','')}"
-        extra_focus = payload.get("focus") or ""
+        return await self.graph.ainvoke(initial_state)
+
+    async def run_qa_stream(self, payload: QuestionPayload) -> AsyncIterator[str]:
+        """Stream the QA answer as linkified HTML fragments.
+
+        Classification is a no-op when the mode is preset, so this walks the
+        same search step as :meth:`run_qa` and then streams tokens from Gemini
+        instead of waiting for the full completion. Citation linkification is
+        applied on paragraph/sentence boundaries rather than per token.
+        """
+
+        state: GuideState = {
+            "query": payload.question or "",
+            "game": payload.game,
+            "focus": payload.focus,
+            "language": payload.language or self.settings.default_language,
+            "mode": "qa",
+            "search_queries": self._build_queries(payload),
+        }
+        state.update(await self._run_search(state))
+        sources = state.get("sources") or state.get("search_results") or []
+        language = state.get("language") or self.settings.default_language
+        prompt = self._build_answer_prompt(state)
+
+        cache_key = self.llm_cache.key_for(prompt, namespace=f"answer:{language}")
+        cached = self.llm_cache.get(cache_key)
+        if cached is not None:
+            yield self._linkify_citations(self._ensure_html(cached), sources)
+            return
+
+        collected: List[str] = []
+        pending = ""
+        async for chunk in self.llm.astream(prompt):
+            piece = self._coerce_content(chunk)
+            if not piece:
+                continue
+            collected.append(piece)
+            pending += piece
+            cut = pending.rfind("</p>")
+            if cut >= 0:
+                cut += len("</p>")
+            else:
+                dot = pending.rfind(". ")
+                cut = dot + 2 if dot >= 0 else -1
+            if cut > 0:
+                ready, pending = pending[:cut], pending[cut:]
+                yield self._linkify_citations(ready, sources)
+        if pending:
+            yield self._linkify_citations(pending, sources)
+        if collected:
+            self.llm_cache.set(cache_key, "".join(collected))
+
+    async def run_guide(self, payload: GuidePayload) -> Dict[str, Any]:
+        base_query = f"videogioco {payload.game or ''}"
+        extra_focus = payload.focus or ""
         composed_query = f"{base_query} {extra_focus}".strip()
         initial_state: GuideState = {
             "query": composed_query,
-            "game": payload.get("game"),
-            "focus": payload.get("focus"),
-            "extra": payload.get("extra"),
-            "language": payload.get("language") or self.settings.default_language,
+            "game": payload.game,
+            "focus": payload.focus,
+            "extra": payload.extra,
+            "language": payload.language or self.settings.default_language,
             "mode": "guide",
             "search_queries": self._build_queries(payload, include_trophies=True),
         }
-        return self.graph.invoke(initial_state)
-
-    def _build_queries(self, payload: Dict[str, Any], include_trophies: bool = False) -> List[str]:
-        game = payload.get("game") or ""
-        focus = payload.get("focus") or ""
-        question = payload.get("question") or payload.get("query") or ""
-        queries = [question]
-        if game:
-            queries.append(f"{game} trama completa")
-            queries.append(f"{game} missioni guida")
-        if include_trophies and game:
-            queries.append(f"{game} lista trofei PlayStation")
-        if focus:
-            queries.append(f"{game} {focus}")
-        return [q for q in queries if q]
+        return await self.graph.ainvoke(initial_state)
+
+    def _build_queries(
+        self,
+        payload: QuestionPayload | GuidePayload,
+        include_trophies: bool = False,
+    ) -> List[str]:
+        return list(
+            _build_queries_cached(
+                getattr(payload, "question", None) or "",
+                payload.game or "",
+                payload.focus or "",
+                include_trophies,
+            )
+        )
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire ``ttl`` seconds after insert.
+
+    Stdlib-only stand-in for cachetools.TTLCache; safe to share across the
+    worker threads the request handlers run on.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 3600.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < now:
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class LLMCache:
+    """Exact-match cache for LLM responses.
+
+    Keys are SHA-256 digests over (model, temperature, namespace, prompt), so
+    a repeated question served seconds ago skips the full Gemini round-trip.
+    Callers namespace keys by language/mode to avoid cross-context reuse and
+    simply skip the cache for long-form guide content that should stay fresh.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        temperature: float,
+        maxsize: int = 4096,
+        ttl: float = 3600.0,
+    ) -> None:
+        self._prefix = f"{model}\x1f{temperature}\x1f"
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def key_for(self, prompt: str, namespace: str = "") -> str:
+        raw = f"{self._prefix}{namespace}\x1f{prompt}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self._cache.set(key, value)
@@ -1,30 +1,77 @@
 from __future__ import annotations
 
+import asyncio
+import atexit
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 import httpx
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib json keeps things working
+    orjson = None
+
+from app.config import get_settings
+from app.services.llm_cache import TTLCache
+
 
 logger = logging.getLogger(__name__)
 
+# Caps in-flight SerpAPI requests across all orchestrator fan-outs so bursts
+# of concurrent guides cannot trip the provider's rate limits. Created lazily
+# so it binds to the running event loop and reads the configured limit.
+_search_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_search_semaphore() -> asyncio.Semaphore:
+    global _search_semaphore
+    if _search_semaphore is None:
+        _search_semaphore = asyncio.Semaphore(get_settings().serpapi_max_concurrency)
+    return _search_semaphore
+
+# Identical queries from concurrent users within the TTL are served from
+# memory instead of being billed and blocked on SerpAPI again.
+_RESULT_CACHE = TTLCache(maxsize=512, ttl=600)
+
+
+def _cache_key(
+    query: str, language: str, country: str, max_results: int
+) -> Tuple[str, str, str, int]:
+    return (query, language, country, max_results)
+
+
+def _cached_results(key: Tuple[str, str, str, int]) -> Optional[List[Dict[str, str]]]:
+    cached = _RESULT_CACHE.get(key)
+    if cached is None:
+        return None
+    # Shallow copy so callers can reorder/trim without touching the cache.
+    return list(cached)
+
 SERPAPI_ENDPOINT = "https://serpapi.com/search"
 
+# Shared pooled client for the async fan-out: connections (and their TLS
+# handshakes) are reused across all SerpAPI calls in the process.
+_ASYNC_CLIENT = httpx.AsyncClient(
+    http2=True,
+    timeout=15,
+    limits=httpx.Limits(max_keepalive_connections=8, max_connections=16),
+)
 
-def search_web(
-    query: str,
-    *,
-    api_key: str,
-    max_results: int = 6,
-    country: str = "it",
-    language: str = "it",
-) -> List[Dict[str, str]]:
-    """Query SerpAPI (Google Search) to retrieve high-quality snippets."""
+# Pooled counterpart for the sync entry point: module-level httpx.get spun up
+# a throwaway client (and TLS handshake) per call.
+_CLIENT = httpx.Client(
+    http2=True,
+    timeout=15,
+    limits=httpx.Limits(max_keepalive_connections=8, max_connections=16),
+)
+atexit.register(_CLIENT.close)
 
-    if not query:
-        return []
 
-    params = {
+def _build_params(
+    query: str, api_key: str, max_results: int, country: str, language: str
+) -> Dict[str, str | int]:
+    return {
         "engine": "google",
         "q": query,
         "gl": country,
@@ -33,14 +80,8 @@ def search_web(
         "api_key": api_key,
     }
 
-    try:
-        response = httpx.get(SERPAPI_ENDPOINT, params=params, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-    except httpx.HTTPError as exc:
-        logger.exception("SerpAPI search failed for query '%s': %s", query, exc)
-        return []
 
+def _clean_results(data: Dict, max_results: int) -> List[Dict[str, str]]:
     organic = data.get("organic_results") or []
     cleaned: List[Dict[str, str]] = []
     seen_urls: set[str] = set()
@@ -64,3 +105,68 @@ def search_web(
             break
 
     return cleaned
+
+
+async def search_web_async(
+    query: str,
+    *,
+    api_key: str,
+    max_results: int = 6,
+    country: str = "it",
+    language: str = "it",
+) -> List[Dict[str, str]]:
+    """Async variant of :func:`search_web` sharing one pooled HTTP client."""
+
+    if not query:
+        return []
+
+    key = _cache_key(query, language, country, max_results)
+    cached = _cached_results(key)
+    if cached is not None:
+        return cached
+
+    params = _build_params(query, api_key, max_results, country, language)
+    try:
+        async with _get_search_semaphore():
+            response = await _ASYNC_CLIENT.get(SERPAPI_ENDPOINT, params=params)
+        response.raise_for_status()
+        data = orjson.loads(response.content) if orjson is not None else response.json()
+    except httpx.HTTPError as exc:
+        logger.exception("SerpAPI search failed for query '%s': %s", query, exc)
+        return []
+
+    results = _clean_results(data, max_results)
+    _RESULT_CACHE.set(key, results)
+    return list(results)
+
+
+def search_web(
+    query: str,
+    *,
+    api_key: str,
+    max_results: int = 6,
+    country: str = "it",
+    language: str = "it",
+) -> List[Dict[str, str]]:
+    """Query SerpAPI (Google Search) to retrieve high-quality snippets."""
+
+    if not query:
+        return []
+
+    key = _cache_key(query, language, country, max_results)
+    cached = _cached_results(key)
+    if cached is not None:
+        return cached
+
+    params = _build_params(query, api_key, max_results, country, language)
+    try:
+        response = _CLIENT.get(SERPAPI_ENDPOINT, params=params)
+        response.raise_for_status()
+        data = orjson.loads(response.content) if orjson is not None else response.json()
+    except httpx.HTTPError as exc:
+        logger.exception("SerpAPI search failed for query '%s': %s", query, exc)
+        return []
+
+    results = _clean_results(data, max_results)
+    _RESULT_CACHE.set(key, results)
+    return list(results)